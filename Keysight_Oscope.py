@@ -15,7 +15,118 @@ Developed by: Mahdi Hayati
 """
 
 
-import pyvisa
+import re
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pyvisa
+
+
+# SCPI command templates, built once and filled with `str.format` by the setters
+_CH_COUPLING        = ":CHANnel{}:COUPling {}"
+_CH_DISPLAY         = ":CHANnel{}:DISPLAY {}"
+_CH_INVERT          = ":CHANnel{}:INVert {}"
+_CH_LABEL           = ":CHANnel{}:LABel '{}'"
+_CH_OFFSET          = ":CHANnel{}:OFFSet {} {}"
+_CH_PROBE           = ":CHANnel{}:PROBe {}"
+_CH_RANGE           = ":CHANnel{}:RANGe {} {}"
+_CH_SCALE           = ":CHANnel{}:SCALe {} {}"
+_CH_UNITS           = ":CHANnel{}:UNITs {}"
+_DISP_LABEL         = ":DISPlay:LABel {}"
+_TIM_SCALE          = ":TIMebase:SCALe {}"
+_TRIG_HOLDOFF       = ":TRIGger:HOLDoff {}"
+_TRIG_MODE          = ":TRIGger:MODE {}"
+_TRIG_NREJECT       = ":TRIGger:NREJect {}"
+_TRIG_LEVEL         = ":TRIGger:EDGE:LEVel {}, {}"
+_TRIG_SLOPE         = ":TRIGger:EDGE:SLOPe {}"
+_TRIG_SOURCE        = ":TRIGger:EDGE:SOURce {}"
+_WGEN_OUTPUT        = ":WGEN:OUTPut {}"
+_WGEN_FREQUENCY     = ":WGEN:FREQuency {}"
+_WGEN_FUNCTION      = ":WGEN:FUNCtion {}"
+_WGEN_PULSE_WIDTH   = ":WGEN:FUNCtion:PULSe:WIDTh {}"
+_WGEN_RAMP_SYMMETRY = ":WGEN:FUNCtion:RAMP:SYMMetry {}"
+_WGEN_SQUARE_DCYCLE = ":WGEN:FUNCtion:SQUare:DCYCle {}"
+_WGEN_AMPLITUDE     = ":WGEN:VOLTage {}"
+_WGEN_OFFSET        = ":WGEN:VOLTage:OFFSet {}"
+
+
+# pyvisa (and the VISA library behind it) is loaded by the first oscilloscope and numpy by the first
+# waveform transfer, not at import time
+_pyvisa = None
+_numpy  = None
+
+
+def _getPyvisa():
+    """
+    Imports pyvisa on first use and returns the module.
+    """
+    global _pyvisa
+    if _pyvisa is None:
+        import pyvisa
+        _pyvisa = pyvisa
+    return _pyvisa
+
+
+def _getNumpy():
+    """
+    Imports numpy on first use and returns the module. Only the waveform functions need it.
+    """
+    global _numpy
+    if _numpy is None:
+        import numpy
+        _numpy = numpy
+    return _numpy
+
+
+def _scpiBool(value):
+    """
+    Converts Python booleans to `1`/`0` for the SCPI parser. Strings such as `ON`/`OFF` are sent unchanged.
+    """
+    if isinstance(value, str):
+        return value
+    return int(bool(value))
+
+
+# measurement sources in long form; the short form (`CHAN1`) and any letter case are accepted as well
+_SOURCES = ('CHANnel1', 'CHANnel2', 'CHANnel3', 'CHANnel4', 'FUNCtion', 'MATH', 'WMEMory1', 'WMEMory2', 'EXTernal')
+_VALID_SOURCES = frozenset([source.upper() for source in _SOURCES] +
+                           [re.sub('[a-z]', '', source) for source in _SOURCES])
+
+
+# read size for binary blocks (screenshots, waveforms) so they arrive in as few transfers as possible.
+# Passed per read: as the resource default, every short query would allocate a buffer this large
+_BLOCK_CHUNK_SIZE = 10 * 1024 * 1024
+
+
+# point counts accepted by `:WAVeform:POINts`; more than 1000 needs `:WAVeform:POINts:MODE` MAXimum or RAW
+_WAVEFORM_POINTS = (100, 250, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000, 200000, 500000, 1000000, 2000000)
+
+
+def _checkSource(source : str):
+    """
+    Raises `ValueError` if the measurement source is not one the oscilloscope accepts.
+    """
+    if source.upper() not in _VALID_SOURCES:
+        raise ValueError(f"invalid source {source!r}, expected one of {', '.join(_SOURCES)}")
+
+
+def _checkChannel(Channel):
+    """
+    Raises `ValueError` unless the channel is an analog channel number (int from 1 to 4).
+    """
+    if isinstance(Channel, bool) or not isinstance(Channel, int) or not 1 <= Channel <= 4:
+        raise ValueError(f"Channel must be an int from 1 to 4, got {Channel!r}")
+
+
+def _checkRange(name : str, value, low, high):
+    """
+    Raises `ValueError` if the value is outside [low, high], before the command reaches the oscilloscope.
+    """
+    if not low <= value <= high:
+        raise ValueError(f"{name} must be between {low} and {high}, got {value}")
 
 
 class Keysight_DSOX1204G:
@@ -31,45 +142,265 @@ class Keysight_DSOX1204G:
     Non-core commands are commands that provide specific features, but are not universal across all Keysight InfiniiVision oscilloscope models. Non-core commands may be modified or deleted in the future.
     """
 
-    def __init__(self, IO_Conf : str):
+    # shared by every instance, created on first use
+    _RM = None
+
+    def __init__(self, IO_Conf : str, rm : 'pyvisa.ResourceManager' = None):
         """
         :param IO_Conf: choose if the device is connected to the PC by `USB` of `LAN`
+        :param rm: optional ResourceManager to open the device with. If not entered, one ResourceManager is shared by all instances.
         """
-        self.IDN      = 'KEYSIGHT TECHNOLOGIES,DSOX1204G,CN60167508,02.10.2019111333\n'
+        self.IDN      = 'KEYSIGHT TECHNOLOGIES,DSOX1204G,CN60167508,02.10.2019111333'
+        self.Model    = 'DSOX1204G'
         self.USB_Addr = 'USB0::10893::918::CN60167508::INSTR'
         self.LAN_Addr = 'TCPIP0::k-dx1204g-67508::hislip0::INSTR'
-        rm = pyvisa.ResourceManager()
+        if rm is None:
+            if Keysight_DSOX1204G._RM is None:
+                Keysight_DSOX1204G._RM = _getPyvisa().ResourceManager()
+            rm = Keysight_DSOX1204G._RM
         if IO_Conf == "LAN":
             self.OS = rm.open_resource(self.LAN_Addr)
         elif IO_Conf == "USB":
             self.OS = rm.open_resource(self.USB_Addr)
+        else:
+            raise ValueError(f"IO_Conf must be 'LAN' or 'USB', got {IO_Conf!r}")
+
+        # terminate every message explicitly so replies end on the newline/EOI instead of waiting for the timeout.
+        # binary block queries clear `read_termination` for the duration of the transfer (see `_binaryQuery`)
+        self.OS.read_termination  = '\n'
+        self.OS.write_termination = '\n'
+        self.OS.send_end          = True
+        self.OS.timeout           = 5000
+
+        # `*IDN?` reply, read once by `IDNCheck`
+        self._idn = None
+
+        # commands queued while inside a `batch()` block
+        self._pending  = []
+        self._batching = False
     
     def close(self):
         self.OS.close()
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        # release the VISA session if the object is dropped without `close()`
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def _write(self, command : str):
+        """
+        Sends the command to the oscilloscope, or queues it if a `batch()` block is active.
+        """
+        if self._batching:
+            self._pending.append(command)
+        else:
+            self.OS.write(command)
+
+    @contextmanager
+    def _binaryTransfer(self):
+        """
+        Clears `read_termination` while a binary block is read, so a 0x0A byte in the payload does not end a read early,
+        and restores it afterwards.
+        """
+        termination = self.OS.read_termination
+        self.OS.read_termination = None
+        self.OS.send_end = True
+        try:
+            yield
+        finally:
+            self.OS.read_termination = termination
+
+    def _binaryQuery(self, command : str, datatype : str = 'B', container = bytes, waitReady : bool = False):
+        """
+        Queries a binary block (IEEE 488.2 `#NLLLL...`) and returns its payload in the given container (bytes by default).
+
+        With `waitReady` the oscilloscope raises a service request once the reply is in its output queue (MAV bit),
+        and the read starts only then, instead of blocking in the read while the reply is still being prepared.
+        """
+        ready = self._serviceRequest(sre=16) if waitReady else nullcontext()
+        with ready as wait:
+            self.OS.write(command)
+            if wait is not None:
+                wait(self.OS.timeout)
+            with self._binaryTransfer():
+                return self.OS.read_binary_values(datatype=datatype, container=container, header_fmt='ieee',
+                                                  chunk_size=_BLOCK_CHUNK_SIZE)
+
+    def _queryFloat(self, command : str):
+        """
+        Queries a single numeric value. Replies such as `+1.2345E-3` are well under 32 bytes,
+        so the answer is read in one call instead of PyVISA's chunked read loop.
+        """
+        self.OS.write(command)
+        return float(self.OS.read_bytes(32, break_on_termchar=True))
+
+    @contextmanager
+    def _serviceRequest(self, sre : int, ese : int = None):
+        """
+        Enables VISA service request events and the given `*SRE` (and `*ESE`) masks for the block and restores
+        the previous masks on exit. Yields a function that waits for the request, `wait(timeout)` in milliseconds.
+
+        The event is enabled before any command is sent, so a request raised before the wait starts is not lost.
+        If the block fails, a device clear drops any reply left in the output queue.
+        """
+        pyvisa    = _getPyvisa()
+        event     = pyvisa.constants.EventType.service_request
+        mechanism = pyvisa.constants.EventMechanism.queue
+
+        setup   = [f"*SRE {sre}"]
+        restore = [f"*SRE {int(self.OS.query('*SRE?'))}"]
+        if ese is not None:
+            setup.insert(0, f"*ESE {ese}")
+            restore.insert(0, f"*ESE {int(self.OS.query('*ESE?'))}")
+
+        def wait(timeout : int):
+            response = self.OS.wait_on_event(event, timeout)
+            response.event.close()
+            # reading the status byte clears the service request
+            self.OS.read_stb()
+
+        self.OS.enable_event(event, mechanism)
+        try:
+            self.OS.write(';'.join(setup))
+            yield wait
+        except BaseException:
+            self.OS.clear()
+            raise
+        finally:
+            self.OS.disable_event(event, mechanism)
+            self.OS.discard_events(event, mechanism)
+            self.OS.write(';'.join(restore))
+
+    @contextmanager
+    def batch(self):
+        """
+        Collects every setter called inside the block and sends them as one
+        semicolon-joined SCPI line on exit, so N settings cost a single write.
+        If the block raises, nothing is sent.
+
+        Queries (`meas*`, `IDNCheck`, ...) are not queued and should not be used inside the block.
+
+        Example
+        -------
+
+        >>> with scope.batch():
+        ...     scope.channelCoupling(1, 'DC')
+        ...     scope.channelRange(1, 5)
+        ...     scope.triggerMode('EDGE')
+        """
+        if self._batching:
+            # nested block, the outer one flushes
+            yield
+            return
+
+        self._batching = True
+        try:
+            yield
+        finally:
+            # on an exception the queued commands are dropped, so no half-applied configuration is sent
+            self._batching = False
+            commands, self._pending = self._pending, []
+
+        if commands:
+            self.OS.write(';'.join(commands))
+
+    def pipeline(self, commands : list):
+        """
+        Sends several commands back-to-back in one raw write, each as its own newline-terminated message,
+        without waiting for a reply in between.
+
+        Only commands without a reply (setters) should be sent this way; do not mix in queries.
+        It cannot be used inside a `batch()` block, since it would be sent ahead of the queued commands.
+
+        :param commands: SCPI commands in the order they should be executed, e.g. [':CHANnel1:COUPling DC', ':TRIGger:MODE EDGE']
+        """
+        if self._batching:
+            raise RuntimeError("pipeline() cannot be used inside a batch() block")
+        if not commands:
+            return
+
+        data = ('\n'.join(commands) + '\n').encode()
+        self.OS.write_raw(data)
+
     def IDNCheck(self):
         """
+        Checks that the connected device is a DSOX1204G. The `*IDN?` reply is queried once and cached,
+        use `invalidateIDNCache` to query it again.
+
         Returns
         --------
         ``TRUE``   Device is detected.
 
         ``FALSE``  Device is not detected.
         """
-        try:
-            if self.OS.query('*IDN?') == self.IDN:
-                return 1
-            else:
+        if self._idn is None:
+            # short timeout so a missing device is reported quickly
+            timeout = self.OS.timeout
+            self.OS.timeout = 500
+            try:
+                self._idn = self.OS.query('*IDN?')
+            except _getPyvisa().errors.VisaIOError:
+                # a late reply would otherwise be read as the answer to the next query
+                try:
+                    self.OS.clear()
+                except _getPyvisa().errors.VisaIOError:
+                    pass
                 return 0
-        except:
+            finally:
+                self.OS.timeout = timeout
+
+        if self.Model in self._idn:
+            return 1
+        else:
             return 0
-        
+
+    def invalidateIDNCache(self):
+        """
+        Forgets the cached `*IDN?` reply so the next `IDNCheck` queries the device again.
+        """
+        self._idn = None
+
     def single(self):
         """
         `Core Command`
         Same as pressing the Single key on the front panel.
         """
         command = ':SINGle'
-        self.OS.write(command)
+        self._write(command)
+
+    def waitForOPC(self, timeout : int = 10000):
+        """
+        `Core Command`
+        Waits until all pending operations are complete, e.g. after `:DIGitize` until the acquisition is done.
+
+        The oscilloscope raises a service request (SRQ) when `*OPC` sets the operation complete bit,
+        so the PC is notified instead of polling the status. The `*SRE`/`*ESE` masks are restored afterwards.
+
+        Commands such as `single()` are sequential and do not hold off `*OPC`; to wait for a `single()` acquisition
+        poll bit 3 (RUN) of `:OPERegister:CONDition?` until it is cleared.
+
+        :param timeout: Maximum waiting time. Unit: `milliseconds`
+
+        Example
+        -------
+
+        >>> scope.OS.write(':DIGitize CHANnel1')
+        >>> scope.waitForOPC()
+        """
+        # reading *ESR? clears an old operation complete bit without touching the error queue
+        self.OS.query('*ESR?')
+        with self._serviceRequest(sre=32, ese=1) as wait:
+            self.OS.write('*OPC')
+            wait(timeout)
+            self.OS.query('*ESR?')
 
     def run(self):
         """
@@ -77,7 +408,7 @@ class Keysight_DSOX1204G:
         Same as pressing the Run key on the front panel.
         """
         command = ':RUN'
-        self.OS.write(command)
+        self._write(command)
 
     def stop(self):
         """
@@ -85,7 +416,7 @@ class Keysight_DSOX1204G:
         Same as pressing the Stop key on the front panel.
         """
         command = ':STOP'
-        self.OS.write(command)
+        self._write(command)
 
     def channelCoupling(self, Channel : int, Coupling : str):
         """
@@ -95,8 +426,9 @@ class Keysight_DSOX1204G:
         :param Channel: Select channel from 1 to 4.
         :param Coupling: Select coupling `AC` or `DC`.
         """
-        command = f":CHANnel{Channel}:COUPling {Coupling}"
-        self.OS.write(command)
+        _checkChannel(Channel)
+        command = _CH_COUPLING.format(Channel, Coupling)
+        self._write(command)
 
     def channelDisplay(self, Channel : int, Value : bool):
         """
@@ -106,8 +438,9 @@ class Keysight_DSOX1204G:
         :param Channel: Select channel from 1 to 4.
         :param Value: Set the display value to {{1 | ON} or {0 | OFF}} in boolian.
         """
-        command = f":CHANnel{Channel}:DISPLAY {Value}"
-        self.OS.write(command)
+        _checkChannel(Channel)
+        command = _CH_DISPLAY.format(Channel, _scpiBool(Value))
+        self._write(command)
 
     def channelInvert(self, Channel : int, Value : bool):
         """
@@ -117,8 +450,9 @@ class Keysight_DSOX1204G:
         :param Channel: Select channel from 1 to 4.
         :param Value: Select 1 to invert and 0 to not invert.
         """
-        command = f":CHANnel{Channel}:INVert {Value}"
-        self.OS.write(command)
+        _checkChannel(Channel)
+        command = _CH_INVERT.format(Channel, _scpiBool(Value))
+        self._write(command)
 
     def channelLabel(self, Channel : int, Label : str):
         """
@@ -128,8 +462,9 @@ class Keysight_DSOX1204G:
         :param Channel: Select channel from 1 to 4.
         :param Label: Label string have 10 characters or less. Labels with more than 10 characters are truncated to 10 characters. Lower case characters are converted to upper case.
         """
-        command = f":CHANnel{Channel}:LABel '{Label}'"
-        self.OS.write(command)
+        _checkChannel(Channel)
+        command = _CH_LABEL.format(Channel, Label)
+        self._write(command)
 
     def channelOffset(self, Channel : int, Offset : int, Suffix : int = 'V'):
         """
@@ -140,8 +475,9 @@ class Keysight_DSOX1204G:
         :param Offset: Select Offset value.
         :param suffix: Select suffix for offset value {`V` | `mV`}. If not entered, `V` will be selected by default.
         """
-        command = f":CHANnel{Channel}:OFFSet {Offset} {Suffix}"
-        self.OS.write(command)
+        _checkChannel(Channel)
+        command = _CH_OFFSET.format(Channel, Offset, Suffix)
+        self._write(command)
 
     def channelProbeAtt(self, Channel : int, Attenuation : int):
         """
@@ -151,8 +487,10 @@ class Keysight_DSOX1204G:
         :param Channel: Select channel from 1 to 4.
         :param Attenuation: Select attenuation factor from 0.1 to 10000.
         """
-        command = f":CHANnel{Channel}:PROBe {Attenuation}"
-        self.OS.write(command)
+        _checkChannel(Channel)
+        _checkRange('Attenuation', Attenuation, 0.1, 10000)
+        command = _CH_PROBE.format(Channel, Attenuation)
+        self._write(command)
 
     def channelRange(self, Channel : int, Range : int, Suffix : str = 'V'):
         """
@@ -163,8 +501,9 @@ class Keysight_DSOX1204G:
         :param Range: Select vertical range.
         :param Suffix: Select suffix for range value {`V` | `mV`}. If not entered, `V` will be selected by default.
         """
-        command = f":CHANnel{Channel}:RANGe {Range} {Suffix}"
-        self.OS.write(command)
+        _checkChannel(Channel)
+        command = _CH_RANGE.format(Channel, Range, Suffix)
+        self._write(command)
 
     def channelScale(self, Channel : int, Scale : int, Suffix : str = 'V'):
         """
@@ -175,8 +514,9 @@ class Keysight_DSOX1204G:
         :param Scale: Select each vertical unit per division.
         :param Suffix: Select suffix for Value {`V` | `mV`}. If not entered, `V` will be selected by default.
         """
-        command = f":CHANnel{Channel}:SCALe {Scale} {Suffix}"
-        self.OS.write(command)
+        _checkChannel(Channel)
+        command = _CH_SCALE.format(Channel, Scale, Suffix)
+        self._write(command)
 
     def channelUnits(self, Channel : int, Unit : str):
         """
@@ -186,8 +526,9 @@ class Keysight_DSOX1204G:
         :param Channel: Select channel from 1 to 4.
         :param Unit: Select `Volt` for a voltage probe and select `AMPere` for a current probe.
         """
-        command = f":CHANnel{Channel}:UNITs {Unit}"
-        self.OS.write(command)
+        _checkChannel(Channel)
+        command = _CH_UNITS.format(Channel, Unit)
+        self._write(command)
 
     def displayLabel(self, status : str):
         """
@@ -196,8 +537,8 @@ class Keysight_DSOX1204G:
 
         :param status: {`ON` | `OFF`}
         """
-        command = f":DISPlay:LABel {status}"
-        self.OS.write(command)
+        command = _DISP_LABEL.format(status)
+        self._write(command)
 
     def saveImage(self, location : str, palette : str = 'COLor'):
         """
@@ -212,22 +553,12 @@ class Keysight_DSOX1204G:
 
         >>> saveImage('NewFolder/screenshot.png')
         """
-        command = f":DISPlay:DATA? PNG, {palette}"
-        self.OS.write(command)
-
-        # since the output of command is binary block, there is no need for decoding
-        data = self.OS.read_raw()
+        # rendering the PNG takes a while, so wait for the reply to be ready before reading it
+        command = f":DISPlay:DATA? PNG,{palette}"
+        data    = self._binaryQuery(command, waitReady=True)
 
-        if data.startswith(b'#'):                                                  # Check if the response has a binary block header
-            header_length = int(data[1:2])                                         # Number of digits in the length field
-            data_length = int(data[2:2 + header_length])                           # Data length
-            binary_data = data[2 + header_length:2 + header_length + data_length]  # Extract the binary data
-        else:
-            binary_data = data  # If no header, use the raw data as-is
-
-        
         with open(location, 'wb') as f:
-            f.write(binary_data)
+            f.write(data)
 
     def measClearAll(self):
         """
@@ -235,7 +566,22 @@ class Keysight_DSOX1204G:
         Clears all selected measurements and markers from the screen.
         """
         command = ':MEASure:CLEar'
-        self.OS.write(command)
+        self._write(command)
+
+    def installMeasurement(self, kind : str, source : str):
+        """
+        `Core Command`
+        Installs a screen measurement on the given source without reading its value.
+
+        The `meas*` functions only send the query form, which installs the measurement on the screen as well,
+        so this is needed only when the readout is wanted without querying the value.
+
+        :param kind: Measurement header, e.g. {`VPP` | `VRMS` | `FREQuency` | `DUTYcycle` | ...}
+        :param source: {`CHANnel<n>` | `FUNCtion` | `MATH` | `WMEMory<r>` | `EXTernal`}  where (n) is The analog channel number and (r) is 1-2
+        """
+        _checkSource(source)
+        command = f":MEASure:{kind} {source}"
+        self._write(command)
 
     def measDutyCycle(self, source : str):
         """
@@ -245,14 +591,11 @@ class Keysight_DSOX1204G:
         :param source: {`CHANnel<n>` | `FUNCtion` | `MATH` | `WMEMory<r>` | `EXTernal`}  where (n) is The analog channel number and (r) is 1-2
         :return DutyCycle: duty cycle = (+pulse width/period)*100
         """
-        # set DutyCycle measurement on the screen
-        command = f":MEASure:DUTYcycle {source}"
-        self.OS.write(command)
-
+        _checkSource(source)
         # query DutyCycle value
         command   = f":MEASure:DUTYcycle? {source}"
-        dutycycle = self.OS.query(command)
-        return float(dutycycle)
+        dutycycle = self._queryFloat(command)
+        return dutycycle
 
     def measFallTime(self, source : str):
         """
@@ -262,14 +605,11 @@ class Keysight_DSOX1204G:
         :param source: {`CHANnel<n>` | `FUNCtion` | `MATH` | `WMEMory<r>` | `EXTernal`}  where (n) is The analog channel number and (r) is 1-2
         :return FallTime: fall time = time at lower threshold - time at upper threshold
         """
-        # set FallTime measurement on the screen
-        command = f":MEASure:FALLtime {source}"
-        self.OS.write(command)
-
+        _checkSource(source)
         # query FallTime value
         command  = f":MEASure:FALLtime? {source}"
-        falltime = self.OS.query(command)
-        return float(falltime)
+        falltime = self._queryFloat(command)
+        return falltime
     
     def measRiseTime(self, source : str):
         """
@@ -279,14 +619,11 @@ class Keysight_DSOX1204G:
         :param source: {`CHANnel<n>` | `FUNCtion` | `MATH` | `WMEMory<r>` | `EXTernal`}  where (n) is The analog channel number and (r) is 1-2
         :return RiseTime: rise time = time at upper threshold - time at lower threshold
         """
-        # set RiseTime measurement on the screen
-        command = f":MEASure:Risetime {source}"
-        self.OS.write(command)
-
+        _checkSource(source)
         # query RiseTime value
         command  = f":MEASure:Risetime? {source}"
-        risetime = self.OS.query(command)
-        return float(risetime)
+        risetime = self._queryFloat(command)
+        return risetime
     
     def measFrequency(self, source : str):
         """
@@ -298,14 +635,11 @@ class Keysight_DSOX1204G:
             THEN frequency = 1/(time at trailing rising edge - time at leading rising edge)
             ELSE frequency = 1/(time at trailing falling edge - time at leading falling edge)
         """
-        # set Frequency measurement on the screen
-        command = f":MEASure:FREQuency {source}"
-        self.OS.write(command)
-
+        _checkSource(source)
         # query Frequency value
         command  = f":MEASure:FREQuency? {source}"
-        frequency = self.OS.query(command)
-        return float(frequency)
+        frequency = self._queryFloat(command)
+        return frequency
 
     def measAmplitude(self, source : str):
         """
@@ -315,14 +649,11 @@ class Keysight_DSOX1204G:
         :param source: {`CHANnel<n>` | `FUNCtion` | `MATH` | `WMEMory<r>` | `EXTernal`}  where (n) is The analog channel number and (r) is 1-2
         :return Amplitude: Vertical amplitude (float)
         """
-        # set Vertical Amplitude measurement on the screen
-        command = f":MEASure:VAMPlitude {source}"
-        self.OS.write(command)
-
+        _checkSource(source)
         # query Vertical Amplitude
         command   = f":MEASure:VAMPlitude? {source}"
-        amplitude = self.OS.query(command)
-        return float(amplitude)
+        amplitude = self._queryFloat(command)
+        return amplitude
     
     def measAverage(self, source : str):
         """
@@ -332,14 +663,11 @@ class Keysight_DSOX1204G:
         :param source: {`CHANnel<n>` | `FUNCtion` | `MATH` | `WMEMory<r>` | `EXTernal`}  where (n) is The analog channel number and (r) is 1-2
         :return Average: Average value (float)
         """
-        # set Average value measurement on the screen
-        command = f":MEASure:VAVerage {source}"
-        self.OS.write(command)
-
+        _checkSource(source)
         # query Average value
         command = f":MEASure:VAVerage? {source}"
-        average = self.OS.query(command)
-        return float(average)
+        average = self._queryFloat(command)
+        return average
     
     def measVBase(self, source : str):
         """
@@ -349,14 +677,11 @@ class Keysight_DSOX1204G:
         :param source: {`CHANnel<n>` | `FUNCtion` | `MATH` | `WMEMory<r>` | `EXTernal`}  where (n) is The analog channel number and (r) is 1-2
         :return Base Voltage: Unit: `Volts` (float)
         """
-        # set Base measurement on the screen
-        command = f":MEASure:VBASe {source}"
-        self.OS.write(command)
-
+        _checkSource(source)
         # query Base value
         command = f":MEASure:VBASe? {source}"
-        Vbase   = self.OS.query(command)
-        return float(Vbase)
+        Vbase   = self._queryFloat(command)
+        return Vbase
     
     def measVTop(self, source : str):
         """
@@ -366,14 +691,11 @@ class Keysight_DSOX1204G:
         :param source: {`CHANnel<n>` | `FUNCtion` | `MATH` | `WMEMory<r>` | `EXTernal`}  where (n) is The analog channel number and (r) is 1-2
         :return Top Voltage: Unit: `Volts` (float)
         """
-        # set Top measurement on the screen
-        command = f":MEASure:VTOP {source}"
-        self.OS.write(command)
-
+        _checkSource(source)
         # query Top value
         command = f":MEASure:VTOP? {source}"
-        Vtop    = self.OS.query(command)
-        return float(Vtop)
+        Vtop    = self._queryFloat(command)
+        return Vtop
     
     def measVMax(self, source : str):
         """
@@ -383,14 +705,11 @@ class Keysight_DSOX1204G:
         :param source: {`CHANnel<n>` | `FUNCtion` | `MATH` | `WMEMory<r>` | `EXTernal`}  where (n) is The analog channel number and (r) is 1-2
         :return Max Voltage: Unit: `Volts` (float)
         """
-        # set MAX measurement on the screen
-        command = f":MEASure:VMAX {source}"
-        self.OS.write(command)
-
+        _checkSource(source)
         # query MAX value
         command = f":MEASure:VMAX? {source}"
-        Vmax    = self.OS.query(command)
-        return float(Vmax)
+        Vmax    = self._queryFloat(command)
+        return Vmax
     
     def measVMin(self, source : str):
         """
@@ -400,14 +719,11 @@ class Keysight_DSOX1204G:
         :param source: {`CHANnel<n>` | `FUNCtion` | `MATH` | `WMEMory<r>` | `EXTernal`}  where (n) is The analog channel number and (r) is 1-2
         :return Min Voltage: Unit: `Volts` (float)
         """
-        # set MIN measurement on the screen
-        command = f":MEASure:VMIN {source}"
-        self.OS.write(command)
-
+        _checkSource(source)
         # query MIN value
         command = f":MEASure:VMIN? {source}"
-        Vmin    = self.OS.query(command)
-        return float(Vmin)
+        Vmin    = self._queryFloat(command)
+        return Vmin
     
     def measVPP(self, source : str):
         """
@@ -417,14 +733,11 @@ class Keysight_DSOX1204G:
         :param source: {`CHANnel<n>` | `FUNCtion` | `MATH` | `WMEMory<r>` | `EXTernal`}  where (n) is The analog channel number and (r) is 1-2
         :return Peak-to-Peak Voltage: Unit: `Volts` (float)
         """
-        # set VPP measurement on the screen
-        command = f":MEASure:VPP {source}"
-        self.OS.write(command)
-
+        _checkSource(source)
         # query VPP value
         command = f":MEASure:VPP? {source}"
-        Vpp     = self.OS.query(command)
-        return float(Vpp)
+        Vpp     = self._queryFloat(command)
+        return Vpp
     
     def measVrms(self, source : str):
         """
@@ -434,14 +747,11 @@ class Keysight_DSOX1204G:
         :param source: {`CHANnel<n>` | `FUNCtion` | `MATH` | `WMEMory<r>` | `EXTernal`}  where (n) is The analog channel number and (r) is 1-2
         :return RMS Value: Unit: `Volts` (float)
         """
-        # set RMS measurement on the screen
-        command = f":MEASure:VRMS {source}"
-        self.OS.write(command)
-
+        _checkSource(source)
         # query RMS value
         command = f":MEASure:VRMS? {source}"
-        Vrms    = self.OS.query(command)
-        return float(Vrms)
+        Vrms    = self._queryFloat(command)
+        return Vrms
     
     def measXMax(self, source : str):
         """
@@ -451,14 +761,11 @@ class Keysight_DSOX1204G:
         :param source: {`CHANnel<n>` | `FUNCtion` | `MATH` | `WMEMory<r>` | `EXTernal`}  where (n) is The analog channel number and (r) is 1-2
         :return X@Max: Unit: `Seconds` (float)
         """
-        # set X Value measurement on the screen
-        command = f":MEASure:XMAX {source}"
-        self.OS.write(command)
-
+        _checkSource(source)
         # query X Value
         command = f":MEASure:XMAX? {source}"
-        X       = self.OS.query(command)
-        return float(X)
+        X       = self._queryFloat(command)
+        return X
     
     def measXMin(self, source : str):
         """
@@ -468,15 +775,120 @@ class Keysight_DSOX1204G:
         :param source: {`CHANnel<n>` | `FUNCtion` | `MATH` | `WMEMory<r>` | `EXTernal`}  where (n) is The analog channel number and (r) is 1-2
         :return X@Min: Unit: `Seconds` (float)
         """
-        # set X Value measurement on the screen
-        command = f":MEASure:XMIN {source}"
-        self.OS.write(command)
-
+        _checkSource(source)
         # query X Value
         command = f":MEASure:XMIN? {source}"
-        X       = self.OS.query(command)
-        return float(X)
-    
+        X       = self._queryFloat(command)
+        return X
+
+    def measureMany(self, kinds : list, source : str):
+        """
+        `Core Command`
+        Queries several measurements on the given source in one compound SCPI command and returns their values.
+
+        :param kinds: Measurement headers, e.g. [`VPP`, `VRMS`, `FREQuency`, `RISetime`]
+        :param source: {`CHANnel<n>` | `FUNCtion` | `MATH` | `WMEMory<r>` | `EXTernal`}  where (n) is The analog channel number and (r) is 1-2
+        :return: dict of {kind: value (float)}
+
+        Example
+        -------
+
+        >>> measureMany(['VPP', 'VRMS', 'FREQuency'], 'CHANnel1')
+        """
+        _checkSource(source)
+        if isinstance(kinds, str):
+            raise TypeError("kinds must be a list of measurement headers, not a single string")
+        if not kinds:
+            return {}
+
+        command = ";".join(f":MEASure:{kind}? {source}" for kind in kinds)
+        values  = self.OS.query(command).strip().split(';')
+        if len(values) != len(kinds):
+            raise ValueError(f"expected {len(kinds)} values for {list(kinds)}, got {len(values)}: {';'.join(values)}")
+        return {kind: float(value) for kind, value in zip(kinds, values)}
+
+    def snapshot(self, source : str):
+        """
+        `Core Command`
+        Returns the common measurements of the given source with a single query.
+
+        :param source: {`CHANnel<n>` | `FUNCtion` | `MATH` | `WMEMory<r>` | `EXTernal`}  where (n) is The analog channel number and (r) is 1-2
+        :return: dict of {kind: value (float)} for `VPP`, `VRMS`, `VAVerage`, `VMAX`, `VMIN`, `FREQuency`, `DUTYcycle`, `RISetime` and `FALLtime`
+        """
+        kinds = ['VPP', 'VRMS', 'VAVerage', 'VMAX', 'VMIN', 'FREQuency', 'DUTYcycle', 'RISetime', 'FALLtime']
+        return self.measureMany(kinds, source)
+
+    def readWaveform(self, Channel : int, Points : int = None):
+        """
+        `Core Command`
+        Reads the waveform of the specified channel as a binary block.
+
+        The `BYTE` format moves 1 byte per sample instead of ~6 characters in `ASCii`, and the samples are
+        written straight into a numpy array without parsing each value in Python.
+
+        :param Channel: Select channel from 1 to 4.
+        :param Points: Number of waveform points to transfer, one of 100, 250, 500, 1000 (or 2000 up to 2000000 after setting
+            `:WAVeform:POINts:MODE` to `MAXimum` or `RAW`). If not entered, the current setting of the oscilloscope is used.
+        :return: numpy array of raw unsigned 8-bit samples. Use `:WAVeform:PREamble?` to convert them to volts.
+        """
+        _checkChannel(Channel)
+
+        if Points is not None and Points not in _WAVEFORM_POINTS:
+            raise ValueError(f"Points must be one of {', '.join(map(str, _WAVEFORM_POINTS))}, got {Points}")
+
+        commands = [f":WAVeform:SOURce CHANnel{Channel}", ":WAVeform:FORMat BYTE"]
+        if Points:
+            commands.append(f":WAVeform:POINts {Points}")
+        self.OS.write(';'.join(commands))
+
+        command = ':WAVeform:DATA?'
+        return self._binaryQuery(command, datatype='B', container=_getNumpy().array)
+
+    def acquireInto(self, buffer : 'np.ndarray', Channel : int):
+        """
+        `Core Command`
+        Reads the waveform of the specified channel into a pre-allocated buffer, so repeated acquisitions
+        of the same size reuse one array instead of allocating a new one on every call.
+
+        :param buffer: 1-D, C-contiguous numpy array of dtype `uint8`. Its length sets the number of waveform points requested
+            and must be one of 100, 250, 500, 1000 (or 2000 up to 2000000 after setting `:WAVeform:POINts:MODE` to `MAXimum` or `RAW`).
+        :param Channel: Select channel from 1 to 4.
+        :return: Number of samples written to the start of `buffer`.
+
+        Example
+        -------
+
+        >>> buffer = np.empty(1000, dtype=np.uint8)
+        >>> while True:
+        ...     n = acquireInto(buffer, 1)
+        """
+        _checkChannel(Channel)
+
+        np = _getNumpy()
+        if buffer.dtype != np.uint8 or buffer.ndim != 1 or not buffer.flags['C_CONTIGUOUS']:
+            raise ValueError("buffer must be a 1-D, C-contiguous numpy array of dtype uint8")
+        if len(buffer) not in _WAVEFORM_POINTS:
+            raise ValueError(f"buffer length must be one of {', '.join(map(str, _WAVEFORM_POINTS))}, got {len(buffer)}")
+
+        commands = [f":WAVeform:SOURce CHANnel{Channel}", ":WAVeform:FORMat BYTE", f":WAVeform:POINts {len(buffer)}"]
+        self.OS.write(';'.join(commands))
+        self.OS.write(':WAVeform:DATA?')
+
+        with self._binaryTransfer():
+            # IEEE 488.2 block header: '#', number of length digits, length
+            header = self.OS.read_bytes(2)
+            length = int(self.OS.read_bytes(int(header[1:2])))
+            if length > len(buffer):
+                # drop the unread block so the next query is not answered with waveform data
+                self.OS.clear()
+                raise ValueError(f"waveform has {length} points but buffer holds only {len(buffer)}")
+
+            memoryview(buffer)[:length] = self.OS.read_bytes(length, chunk_size=len(buffer))
+
+            # trailing message terminator
+            self.OS.read_bytes(1)
+        return length
+
     def timeScale(self, value : float):
         """
         `Non-Core Command`
@@ -484,8 +896,8 @@ class Keysight_DSOX1204G:
 
         :param value: time/div (Second)
         """
-        command = f":TIMebase:SCALe {value}"
-        self.OS.write(command)
+        command = _TIM_SCALE.format(value)
+        self._write(command)
 
     def triggerHoldOFF(self, time : float):
         """
@@ -494,8 +906,8 @@ class Keysight_DSOX1204G:
 
         :param time: Unit: `Seconds`
         """
-        command = f":TRIGger:HOLDoff {time}"
-        self.OS.write(command)
+        command = _TRIG_HOLDOFF.format(time)
+        self._write(command)
 
     def triggerMode(self, mode : str):
         """
@@ -504,8 +916,8 @@ class Keysight_DSOX1204G:
 
         :param mode: {`EDGE` | `GLITch` | `PATTern` | `SHOLd` | `TRANsition` | `TV` | `SBUS1`}
         """
-        command = f":TRIGger:MODE {mode}"
-        self.OS.write(command)
+        command = _TRIG_MODE.format(mode)
+        self._write(command)
 
     def triggerNoiseReject(self, status : bool):
         """
@@ -514,8 +926,8 @@ class Keysight_DSOX1204G:
 
         :param status: {{`0` | `OFF`} | {`1` | `ON`}}
         """
-        command = f":TRIGger:NREJect {status}"
-        self.OS.write(command)
+        command = _TRIG_NREJECT.format(_scpiBool(status))
+        self._write(command)
 
     def triggerlevel(self, level : float, source : str):
         """
@@ -525,8 +937,8 @@ class Keysight_DSOX1204G:
         :param level: Trigger level (Volts)
         :param source: {`CHANnel<n>` | `EXTernal`} where (n) is The analog channel number
         """
-        command = f":TRIGger:EDGE:LEVel {level}, {source}"
-        self.OS.write(command)
+        command = _TRIG_LEVEL.format(level, source)
+        self._write(command)
 
     def triggerSlope(self, slope : str):
         """
@@ -535,8 +947,8 @@ class Keysight_DSOX1204G:
 
         :param slope: {`NEGative` | `POSitive` | `EITHer` | `ALTernate}`}
         """
-        command = f":TRIGger:EDGE:SLOPe {slope}"
-        self.OS.write(command)
+        command = _TRIG_SLOPE.format(slope)
+        self._write(command)
 
     def triggerSource(self, source : str):
         """
@@ -545,8 +957,8 @@ class Keysight_DSOX1204G:
 
         :param source: {`CHANnel<n>` | `EXTernal` | `LINE` | `WGEN`} where (n) is The analog channel number
         """
-        command = f":TRIGger:EDGE:SOURce {source}"
-        self.OS.write(command)
+        command = _TRIG_SOURCE.format(source)
+        self._write(command)
 
     def WGenOutput(self, status : bool):
         """
@@ -555,8 +967,8 @@ class Keysight_DSOX1204G:
 
         :param status: {{`0` | `OFF`} | {`1` | `ON`}}
         """
-        command = f":WGEN:OUTPut {status}"
-        self.OS.write(command)
+        command = _WGEN_OUTPUT.format(_scpiBool(status))
+        self._write(command)
     
     def WGenFrequency(self, frequency : float):
         """
@@ -565,8 +977,8 @@ class Keysight_DSOX1204G:
 
         :param frequency: Unit: `Hz`
         """
-        command = f":WGEN:FREQuency {frequency}"
-        self.OS.write(command)
+        command = _WGEN_FREQUENCY.format(frequency)
+        self._write(command)
 
     def WGenFunction(self, signal : str):
         """
@@ -575,8 +987,8 @@ class Keysight_DSOX1204G:
 
         :param signal: {`SINusoid` | `SQUare` | `RAMP` | `PULSe` | `NOISe` | `DC`}
         """
-        command = f":WGEN:FUNCtion {signal}"
-        self.OS.write(command)
+        command = _WGEN_FUNCTION.format(signal)
+        self._write(command)
 
     def WGenPulseWidth(self, width : float):
         """
@@ -585,8 +997,8 @@ class Keysight_DSOX1204G:
 
         :param width: Pulse width. Unit: `Seconds`
         """
-        command = f":WGEN:FUNCtion:PULSe:WIDTh {width}"
-        self.OS.write(command)
+        command = _WGEN_PULSE_WIDTH.format(width)
+        self._write(command)
 
     def WGenRampSymmetry(self, percent : float):
         """
@@ -597,8 +1009,9 @@ class Keysight_DSOX1204G:
 
         :param percent: Symmetry percentage from 0% to 100%
         """
-        command = f":WGEN:FUNCtion:RAMP:SYMMetry {percent}"
-        self.OS.write(command)
+        _checkRange('percent', percent, 0, 100)
+        command = _WGEN_RAMP_SYMMETRY.format(percent)
+        self._write(command)
 
     def WGenSquareDCycle(self, DCycle : float):
         """
@@ -609,8 +1022,9 @@ class Keysight_DSOX1204G:
 
         :param DCycle: Duty cycle percentage from 1% to 99%
         """
-        command = f":WGEN:FUNCtion:SQUare:DCYCle {DCycle}"
-        self.OS.write(command)
+        _checkRange('DCycle', DCycle, 1, 99)
+        command = _WGEN_SQUARE_DCYCLE.format(DCycle)
+        self._write(command)
 
     def WGenAmplitude(self, amplitude : float):
         """
@@ -619,8 +1033,8 @@ class Keysight_DSOX1204G:
 
          :param amplitude: Unit: `Volts`
         """
-        command = f":WGEN:VOLTage {amplitude}"
-        self.OS.write(command)
+        command = _WGEN_AMPLITUDE.format(amplitude)
+        self._write(command)
 
     def WGenOffset(self, offset : float):
         """
@@ -629,8 +1043,44 @@ class Keysight_DSOX1204G:
 
          :param offset: Unit: `Volts`
         """
-        command = f":WGEN:VOLTage:OFFSet {offset}"
-        self.OS.write(command)
+        command = _WGEN_OFFSET.format(offset)
+        self._write(command)
+
 
+class AsyncKeysight_DSOX1204G:
+    """
+    Runs the functions of `Keysight_DSOX1204G` on a worker thread that belongs to this instance.
+
+    Every call is returned as a `concurrent.futures.Future`. Each instance has exactly one worker,
+    so access to one oscilloscope stays serialized while several oscilloscopes work in parallel.
+
+    Example
+    -------
+
+    >>> scopes = [AsyncKeysight_DSOX1204G(Keysight_DSOX1204G('USB')), AsyncKeysight_DSOX1204G(Keysight_DSOX1204G('LAN'))]
+    >>> futures = [scope.submit('measVPP', 'CHANnel1') for scope in scopes]
+    >>> values = [future.result() for future in futures]
+    """
+
+    def __init__(self, scope : Keysight_DSOX1204G):
+        """
+        :param scope: Oscilloscope to control. It should not be used directly while wrapped.
+        """
+        self.scope     = scope
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def submit(self, method : str, *args, **kwargs):
+        """
+        Queues a call to the given function of the oscilloscope.
 
+        :param method: Name of the `Keysight_DSOX1204G` function, e.g. `measVPP`
+        :return: `Future` holding the return value of the function
+        """
+        return self._executor.submit(getattr(self.scope, method), *args, **kwargs)
 
+    def close(self):
+        """
+        Waits for the queued calls to finish, then closes the oscilloscope.
+        """
+        self._executor.shutdown(wait=True)
+        self.scope.close()